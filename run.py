@@ -4,26 +4,62 @@ import argparse
 import asyncio
 import logging
 import sys
+from itertools import chain, islice
 from pathlib import Path
 from datetime import datetime
-from src.scrapers.static_scraper import StaticScraper
-from src.scrapers.dynamic_scraper import scrape_dynamic
 from src.config import Config
-import json
+import orjson
 import csv
 
 def save_json(data, path):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    Path(path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+CSV_CHUNK_SIZE = 256
+CSV_BUFFER_SIZE = 1 << 20
 
 def save_csv(data, path):
-    if not data:
-        return
-    keys = data[0].keys()
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, keys)
-        writer.writeheader()
-        writer.writerows(data)
+    """Stream rows from any iterable of product dicts to disk, returning the row count."""
+    rows = iter(data)
+    first = next(rows, None)
+    if first is None:
+        return 0
+    keys = tuple(first)
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8", buffering=CSV_BUFFER_SIZE) as f:
+        writer = csv.writer(f)
+        writer.writerow(keys)
+        rows = chain([first], rows)
+        while True:
+            chunk = list(islice(rows, CSV_CHUNK_SIZE))
+            if not chunk:
+                break
+            writer.writerows(tuple(row.get(key, "") for key in keys) for row in chunk)
+            count += len(chunk)
+    return count
+
+async def run_dynamic(url, max_products, config):
+    from src.scrapers.dynamic_scraper import scrape_dynamic, shutdown as shutdown_dynamic
+
+    try:
+        return await scrape_dynamic(url, max_products, config)
+    finally:
+        await shutdown_dynamic()
+
+async def run_both(url, max_products, config, logger):
+    from src.scrapers.static_scraper import StaticScraper
+    from src.scrapers.dynamic_scraper import scrape_dynamic_many, shutdown as shutdown_dynamic
+
+    # The static scraper drives its own event loop, so it runs in a worker thread alongside the browser
+    static_scraper = StaticScraper(config=config, logger=logger)
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.gather(
+            loop.run_in_executor(None, static_scraper.scrape_static, url, max_products),
+            scrape_dynamic_many([url], max_products, config),
+        )
+    finally:
+        static_scraper.close()
+        await shutdown_dynamic()
 
 def setup_logger(level: str):
     logging.basicConfig(
@@ -52,52 +88,68 @@ def main():
     target_url = args.url or config.TARGET_URLS[0]
 
     all_products = []
+    product_count = 0
+    csv_streamed = False
+    scraper = None
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_dir = Path("output")
+    output_dir.mkdir(exist_ok=True)
+    saved_files = []
 
     try:
+        # Scrapers are imported per mode so a static run never loads Playwright, and vice versa
         if args.mode == "static":
+            from src.scrapers.static_scraper import StaticScraper
+
             logger.info(f"Starting static scraper for {target_url}")
             scraper = StaticScraper(config=config, logger=logger)
-            products = scraper.scrape_static(target_url, config.MAX_PRODUCTS)
-            all_products.extend(products)
+            products = scraper.iter_static(target_url, config.MAX_PRODUCTS)
+            if args.output_format == "csv":
+                # Only CSV requested: write rows as they are scraped instead of buffering them
+                csv_path = output_dir / f"products_{timestamp}.csv"
+                product_count = save_csv(products, csv_path)
+                saved_files.append(str(csv_path))
+                csv_streamed = True
+            else:
+                all_products = list(products)
 
         elif args.mode == "dynamic":
             logger.info(f"Starting dynamic scraper for {target_url}")
-            products = asyncio.run(scrape_dynamic(target_url, config.MAX_PRODUCTS, config))
-            all_products.extend(products)
+            all_products = asyncio.run(run_dynamic(target_url, config.MAX_PRODUCTS, config))
 
         elif args.mode == "both":
-            logger.info(f"Starting static scraper for {target_url}")
-            static_scraper = StaticScraper(config=config, logger=logger)
-            static_products = static_scraper.scrape_static(target_url, config.MAX_PRODUCTS // 2)
-            logger.info(f"Starting dynamic scraper for {target_url}")
-            dynamic_products = asyncio.run(scrape_dynamic(target_url, config.MAX_PRODUCTS // 2, config))
-            all_products.extend(static_products)
+            logger.info(f"Starting static and dynamic scrapers for {target_url}")
+            static_products, dynamic_products = asyncio.run(
+                run_both(target_url, config.MAX_PRODUCTS // 2, config, logger)
+            )
+            # Append to the static list in place rather than copying both into a third one
+            all_products = static_products
             all_products.extend(dynamic_products)
 
-        logger.info(f"Scraping completed. Extracted {len(all_products)} products")
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_dir = Path("output")
-        output_dir.mkdir(exist_ok=True)
-        saved_files = []
+        product_count = product_count or len(all_products)
+        logger.info(f"Scraping completed. Extracted {product_count} products")
 
         if args.output_format in ["json", "both"]:
             json_path = output_dir / f"products_{timestamp}.json"
             save_json(all_products, json_path)
             saved_files.append(str(json_path))
 
-        if args.output_format in ["csv", "both"]:
+        if args.output_format in ["csv", "both"] and not csv_streamed:
             csv_path = output_dir / f"products_{timestamp}.csv"
             save_csv(all_products, csv_path)
             saved_files.append(str(csv_path))
 
         logger.info(f"Saved output files: {', '.join(saved_files)}")
-        print(f"Scraping done. Extracted {len(all_products)} products.")
+        print(f"Scraping done. Extracted {product_count} products.")
         print(f"Output files: {', '.join(saved_files)}")
 
     except Exception as e:
         logger.error(f"Scraping failed: {e}")
         sys.exit(1)
+    finally:
+        if scraper is not None:
+            scraper.close()
 
 if __name__ == "__main__":
     main()
@@ -10,6 +10,11 @@ class Config:
     MAX_PRODUCTS: int = 50
     REQUEST_TIMEOUT: int = 10
     REQUEST_DELAY: float = 1.5
+    # Pages fetched in parallel per batch; a handful keeps the target server comfortable
+    MAX_CONCURRENCY: int = 8
+    # Static pages are parsed as UTF-8; enable to sniff the encoding from the bytes and meta tags.
+    # Sniffing uses selectolax's Modest backend, which only exists before selectolax 1.0
+    DETECT_PAGE_ENCODING: bool = False
 
     ROTATE_USER_AGENTS: bool = True
 
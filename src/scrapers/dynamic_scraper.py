@@ -1,61 +1,152 @@
 import asyncio
-import json
 import logging
+import orjson
 from typing import List, Dict
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from src.config import Config
 
+logger = logging.getLogger(__name__)
+
+# Project the product list in-page so only the needed fields cross the DevTools protocol,
+# returned as one JSON string for orjson instead of Playwright's per-value serialisation.
+# Missing fields become null so every product keeps the same keys
+EXTRACT_PRODUCTS_JS = """
+(el, maxProducts) => JSON.stringify(
+    JSON.parse(el.textContent)
+        .props.pageProps.product_list
+        .slice(0, maxProducts)
+        .map((p) => ({
+            id: p.id ?? null,
+            name: p.name ?? null,
+            slug: p.slug ?? null,
+            price: p.price ?? null,
+            regular_price: p.regular_price ?? null,
+            image: p.featured_image ?? null,
+            description: p.description ?? null,
+        }))
+)
+"""
+
+# Resource types never read by the scraper; aborting them speeds up navigation
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+async def _block_unneeded_resources(route) -> None:
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+# Shared browser, launched lazily on first use and reused across scrape calls.
+# It lives until shutdown() is awaited on the same event loop; every asyncio.run() that
+# scrapes without an injected browser must await shutdown() before returning.
+_pw = None
+_browser = None
+_lock = asyncio.Lock()
+_loop = None
+
+async def _get_browser():
+    global _pw, _browser, _lock, _loop
+    loop = asyncio.get_running_loop()
+    if _loop is not loop:
+        # Playwright objects are bound to the loop that created them; a new loop needs a new browser.
+        # The old one cannot be closed from here, so a missed shutdown() leaves its processes running
+        if _browser is not None:
+            logger.warning("Shared browser from a previous event loop was never shut down; await shutdown() before the loop ends")
+        _pw, _browser, _lock, _loop = None, None, asyncio.Lock(), loop
+    async with _lock:
+        if _browser is None:
+            _pw = await async_playwright().start()
+            _browser = await _pw.chromium.launch(headless=True)
+    return _browser
+
+async def shutdown() -> None:
+    """
+    Close the shared browser and stop Playwright. Must run on the same event loop that used it.
+    """
+    global _pw, _browser
+    async with _lock:
+        if _browser is not None:
+            await _browser.close()
+            _browser = None
+        if _pw is not None:
+            await _pw.stop()
+            _pw = None
+
 class DynamicScraper:
-    def __init__(self, config: Config = Config()):
+    def __init__(self, config: Config = Config(), browser=None):
         self.config = config
+        # Optional externally managed browser; otherwise the shared module browser is used
+        self.browser = browser
         self.logger = logging.getLogger(__name__)
 
+    async def _get_browser(self):
+        return self.browser or await _get_browser()
+
     async def scrape_dynamic(self, url: str, max_products: int = 50) -> List[Dict]:
+        browser = await self._get_browser()
+        return await self._scrape_page(browser, url, max_products)
+
+    async def scrape_dynamic_many(self, urls: List[str], max_products: int = 50, max_concurrency: int = 5) -> List[Dict]:
+        """
+        Scrape several URLs concurrently in the shared browser, bounding the number of open pages.
+        max_products applies to each URL, not to the combined result.
+        """
+        browser = await self._get_browser()
+        sem = asyncio.Semaphore(max_concurrency)
+        results = await asyncio.gather(*(self._scrape_one(browser, url, sem, max_products) for url in urls))
+        return [product for products in results for product in products]
+
+    async def _scrape_one(self, browser, url: str, sem: asyncio.Semaphore, max_products: int) -> List[Dict]:
+        async with sem:
+            return await self._scrape_page(browser, url, max_products)
+
+    async def _scrape_page(self, browser, url: str, max_products: int) -> List[Dict]:
         products = []
+        context = None
+
+        try:
+            self.logger.info(f"Opening browser context for URL: {url}")
+            context = await browser.new_context()
+            await context.route("**/*", _block_unneeded_resources)
+            page = await context.new_page()
 
-        self.logger.info(f"Launching browser for URL: {url}")
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-
-            try:
-                self.logger.info(f"Navigating to {url} with timeout 20s")
-                await page.goto(url, timeout=20000)
-                self.logger.debug("Waiting for __NEXT_DATA__ script tag")
-                script = await page.wait_for_selector('script#__NEXT_DATA__', timeout=20000)
-                content = await script.inner_text()
-                self.logger.debug("Extracted __NEXT_DATA__ content")
-
-                data = json.loads(content)
-
-                product_list = data.get("props", {}).get("pageProps", {}).get("product_list", [])
-                self.logger.info(f"Found {len(product_list)} products in JSON data")
-
-                for p_item in product_list[:max_products]:
-                    product = {
-                        "id": p_item.get("id"),
-                        "name": p_item.get("name"),
-                        "slug": p_item.get("slug"),
-                        "price": p_item.get("price"),
-                        "regular_price": p_item.get("regular_price"),
-                        "image": p_item.get("featured_image"),
-                        "description": p_item.get("description"),
-                        "url": f"https://electricbikecompany.com/shop/products/{p_item.get('slug')}"
-                    }
-                    products.append(product)
-
-            except PlaywrightTimeoutError as e:
-                self.logger.error(f"Timeout while waiting for page or elements: {e}")
-            except json.JSONDecodeError as e:
-                self.logger.error(f"Failed to parse JSON from __NEXT_DATA__: {e}")
-            except Exception as e:
-                self.logger.error(f"Error during scraping: {e}")
-            finally:
-                await browser.close()
-                self.logger.info("Browser closed, scraping finished")
+            self.logger.info(f"Navigating to {url} with timeout 20s")
+            # __NEXT_DATA__ is inlined in the HTML, so there is no need to wait for the full load event
+            await page.goto(url, timeout=20000, wait_until="domcontentloaded")
+            self.logger.debug("Extracting product list from __NEXT_DATA__")
+            content = await page.eval_on_selector('script#__NEXT_DATA__', EXTRACT_PRODUCTS_JS, max_products)
+            product_list = orjson.loads(content)
+            self.logger.info(f"Found {len(product_list)} products in JSON data")
+
+            products = [
+                {**p_item, "url": f"https://electricbikecompany.com/shop/products/{p_item.get('slug')}"}
+                for p_item in product_list
+            ]
+
+        except PlaywrightTimeoutError as e:
+            self.logger.error(f"Timeout while waiting for page or elements: {e}")
+        except orjson.JSONDecodeError as e:
+            self.logger.error(f"Failed to parse JSON from __NEXT_DATA__: {e}")
+        except Exception as e:
+            self.logger.error(f"Error during scraping: {e}")
+        finally:
+            if context is not None:
+                await context.close()
+            self.logger.info("Browser context closed, scraping finished")
 
         return products
 
-async def scrape_dynamic(url: str, max_products: int = 50, config: Config = Config()) -> List[Dict]:
-    scraper = DynamicScraper(config)
+async def scrape_dynamic(url: str, max_products: int = 50, config: Config = Config(), browser=None) -> List[Dict]:
+    """
+    Scrape one URL. Without an injected browser the shared one is used, so await shutdown() when done.
+    """
+    scraper = DynamicScraper(config, browser=browser)
     return await scraper.scrape_dynamic(url, max_products)
+
+
+async def scrape_dynamic_many(urls: List[str], max_products: int = 50, config: Config = Config(), max_concurrency: int = 5, browser=None) -> List[Dict]:
+    """
+    Scrape several URLs concurrently, taking up to max_products from each URL.
+    """
+    scraper = DynamicScraper(config, browser=browser)
+    return await scraper.scrape_dynamic_many(urls, max_products, max_concurrency)
@@ -1,8 +1,18 @@
+import asyncio
+import random
 import time
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+import httpx
+# Lexbor backend: faster parsing and CSS matching than Modest, and the only one left in selectolax 1.0
+from selectolax.lexbor import LexborHTMLParser
+try:
+    # Modest is only needed to sniff page encodings (DETECT_PAGE_ENCODING); selectolax 1.0 removed it
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+from typing import Iterator, List, Dict, Optional, Tuple
 from src.config import Config
+from src.utils.pagination import PaginationHandler
+from src.utils.anti_bot import async_backoff, backoff
 from urllib.parse import urljoin
 import logging
 
@@ -12,68 +22,161 @@ USER_AGENTS = [
     "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:115.0) Gecko/20100101 Firefox/115.0",
 ]
 
+# Header dicts built once at import; get_headers hands out copies so callers may mutate them
+_HEADER_VARIANTS = tuple({"User-Agent": ua} for ua in USER_AGENTS)
+
 class StaticScraper:
-    def __init__(self, config: Config = Config(), logger: Optional[logging.Logger] = None):
+    def __init__(self, config: Config = Config(), logger: Optional[logging.Logger] = None, client: Optional[httpx.Client] = None):
         self.config = config
         self.base_url = "https://books.toscrape.com"
-        self.session = requests.Session()
+        self.retry_count = 3
+        if config.DETECT_PAGE_ENCODING and HTMLParser is None:
+            raise RuntimeError("DETECT_PAGE_ENCODING needs selectolax's Modest backend, which selectolax 1.0 removed; install selectolax<1.0")
+        # One keep-alive HTTP/2 connection is reused for every synchronous request;
+        # an injected client stays owned by the caller and is left open by close()
+        self._owns_client = client is None
+        self.client = client or httpx.Client(http2=True, timeout=config.REQUEST_TIMEOUT, follow_redirects=True)
         self.logger = logger or logging.getLogger(__name__)
 
+    def close(self) -> None:
+        if self._owns_client:
+            self.client.close()
+
     def get_headers(self) -> Dict[str, str]:
-        import random
         if self.config.ROTATE_USER_AGENTS:
-            ua = random.choice(USER_AGENTS)
-        else:
-            ua = USER_AGENTS[0]
-        return {"User-Agent": ua}
+            return random.choice(_HEADER_VARIANTS).copy()
+        return _HEADER_VARIANTS[0].copy()
 
     def scrape_static(self, url: str, max_products: int = 50) -> List[Dict]:
-        products = []
+        return list(self.iter_static(url, max_products))
+
+    def iter_static(self, url: str, max_products: int = 50) -> Iterator[Dict]:
+        """
+        Yield products page by page so callers can stream them without holding the full result.
+        """
+        count = 0
         current_url = url or self.base_url
 
-        while current_url:
-            self.logger.info(f"Scraping page: {current_url}")
-            try:
-                resp = self.session.get(current_url, headers=self.get_headers(), timeout=self.config.REQUEST_TIMEOUT)
-                resp.raise_for_status()
-            except Exception as e:
-                self.logger.error(f"[StaticScraper] Request failed: {e}")
-                break
+        # Fetch the first page synchronously to discover the pagination pattern
+        self.logger.info(f"Scraping page: {current_url}")
+        try:
+            resp = self.client.get(current_url, headers=self.get_headers())
+            for _ in range(self.retry_count):
+                if resp.status_code != 429:
+                    break
+                self.logger.warning(f"[StaticScraper] Rate limited on {current_url}, backing off")
+                backoff(increase=True)
+                resp = self.client.get(current_url, headers=self.get_headers())
+            resp.raise_for_status()
+        except Exception as e:
+            self.logger.error(f"[StaticScraper] Request failed: {e}")
+            return
+
+        page_products, next_url = self._parse_page(resp.content, current_url, max_products)
+        yield from page_products
+        count += len(page_products)
+        # Page 1's size estimates how many more pages the limit needs, so batches never overshoot it
+        per_page = len(page_products)
+        self.logger.info(f"Collected {count} products so far")
 
-            soup = BeautifulSoup(resp.text, "lxml")
-            items = soup.select("article.product_pod")
+        pagination = PaginationHandler(current_url)
+        loop = asyncio.new_event_loop()
+        client = httpx.AsyncClient(http2=True, timeout=self.config.REQUEST_TIMEOUT, follow_redirects=True)
 
-            for item in items:
-                if max_products and len(products) >= max_products:
-                    break
+        try:
+            while next_url and not (max_products and count >= max_products):
+                # Speculatively queue the following pages so a whole batch is fetched concurrently;
+                # the batch size itself bounds the number of requests in flight
+                batch_size = self.config.MAX_CONCURRENCY
+                if max_products and per_page:
+                    batch_size = min(batch_size, -(-(max_products - count) // per_page))
+                batch = [next_url]
+                while len(batch) < batch_size:
+                    candidate = pagination._construct_next_page_url(batch[-1])
+                    if not candidate:
+                        break
+                    batch.append(candidate)
 
-                name = item.h3.a.get("title", "").strip()
-                price_el = item.select_one("p.price_color")
-                price = price_el.text.strip() if price_el else ""
-                link = item.h3.a.get("href", "")
-                if not link.startswith("http"):
-                    link = urljoin(current_url, link)
+                responses = loop.run_until_complete(self._fetch_batch(client, batch))
 
-                product = {"name": name, "price": price, "link": link}
-                products.append(product)
+                # Parse in submission order, stopping where the real next link leaves the speculated sequence
+                for i, (page_url, result) in enumerate(zip(batch, responses)):
+                    self.logger.info(f"Scraping page: {page_url}")
+                    if isinstance(result, Exception):
+                        self.logger.error(f"[StaticScraper] Request failed: {result}")
+                        self.logger.warning(f"[StaticScraper] Crawl stopped early at {page_url} with {count} products")
+                        next_url = None
+                        break
 
-            self.logger.info(f"Collected {len(products)} products so far")
+                    remaining = max_products - count if max_products else 0
+                    page_products, next_url = self._parse_page(result.content, page_url, remaining)
+                    yield from page_products
+                    count += len(page_products)
+                    self.logger.info(f"Collected {count} products so far")
 
-            if max_products and len(products) >= max_products:
-                break
+                    if not next_url or (max_products and count >= max_products):
+                        break
+                    if i + 1 < len(batch) and batch[i + 1] != next_url:
+                        break
+
+                if next_url and not (max_products and count >= max_products):
+                    time.sleep(self.config.REQUEST_DELAY)
+        finally:
+            loop.run_until_complete(client.aclose())
+            loop.close()
+
+        self.logger.info(f"Scraping finished. Total products collected: {count}")
+
+    async def _fetch_batch(self, client: httpx.AsyncClient, urls: List[str]) -> list:
+        return await asyncio.gather(*(self._fetch_page(client, page_url) for page_url in urls))
+
+    async def _fetch_page(self, client: httpx.AsyncClient, url: str):
+        try:
+            resp = await client.get(url, headers=self.get_headers())
+            for _ in range(self.retry_count):
+                if resp.status_code != 429:
+                    break
+                self.logger.warning(f"[StaticScraper] Rate limited on {url}, backing off")
+                await async_backoff(increase=True)
+                resp = await client.get(url, headers=self.get_headers())
+            resp.raise_for_status()
+            return resp
+        except Exception as e:
+            return e
+
+    def _parse_page(self, html: bytes, page_url: str, max_products: int) -> Tuple[List[Dict], Optional[str]]:
+        products = []
+        if self.config.DETECT_PAGE_ENCODING:
+            # Only the Modest parser can sniff the encoding from the bytes and meta tags
+            tree = HTMLParser(html, detect_encoding=True, use_meta_tags=True)
+        else:
+            tree = LexborHTMLParser(html)
+        items = tree.css("article.product_pod")
+        if max_products:
+            items = items[:max_products]
 
-            next_button = soup.select_one("li.next > a")
-            if next_button:
-                next_href = next_button.get("href")
-                current_url = urljoin(current_url, next_href)
-            else:
-                current_url = None
+        for item in items:
+            title_link = item.css_first("h3 a")
+            if title_link is None:
+                continue
+            # selectolax builds a new dict on every .attributes access, so read it once per card
+            attrs = title_link.attributes
+            name = (attrs.get("title") or "").strip()
+            price_el = item.css_first("p.price_color")
+            price = price_el.text(strip=True) if price_el else ""
+            link = attrs.get("href") or ""
+            if not link.startswith("http"):
+                link = urljoin(page_url, link)
 
-            time.sleep(self.config.REQUEST_DELAY)
+            products.append({"name": name, "price": price, "link": link})
 
-        self.logger.info(f"Scraping finished. Total products collected: {len(products)}")
-        return products
+        next_button = tree.css_first("li.next > a")
+        next_url = urljoin(page_url, next_button.attributes.get("href") or "") if next_button else None
+        return products, next_url
 
-def scrape_static(url: str, max_products: int = 50, config: Config = Config(), logger: Optional[logging.Logger] = None) -> List[Dict]:
-    scraper = StaticScraper(config=config, logger=logger)
-    return scraper.scrape_static(url, max_products)
+def scrape_static(url: str, max_products: int = 50, config: Config = Config(), logger: Optional[logging.Logger] = None, client: Optional[httpx.Client] = None) -> List[Dict]:
+    scraper = StaticScraper(config=config, logger=logger, client=client)
+    try:
+        return scraper.scrape_static(url, max_products)
+    finally:
+        scraper.close()
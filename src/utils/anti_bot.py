@@ -3,6 +3,8 @@
 import random
 import time
 import asyncio
+import re
+from functools import lru_cache
 from typing import Dict, Optional
 
 class AntiBot:
@@ -48,10 +50,7 @@ ACCEPT_LANGUAGES = [
     "en-US,en;q=0.9,fr;q=0.8",
 ]
 
-def get_headers() -> Dict[str, str]:
-    """
-    Generate realistic rotated HTTP headers to mimic real browsers.
-    """
+def _build_headers() -> Dict[str, str]:
     headers = {
         "User-Agent": random.choice(USER_AGENTS),
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
@@ -77,14 +76,23 @@ def get_headers() -> Dict[str, str]:
     
     return headers
 
+# Header sets assembled once at import; get_headers picks one instead of rebuilding per request
+_HEADER_VARIANTS = tuple(_build_headers() for _ in range(32))
+
+# Proxy configs normalised once, with direct connection as an empty dict
+_PROXY_VARIANTS = tuple(proxy or {} for proxy in PROXIES)
+
+def get_headers() -> Dict[str, str]:
+    """
+    Return realistic rotated HTTP headers to mimic real browsers.
+    """
+    return _HEADER_VARIANTS[random.getrandbits(5)].copy()
+
 def rotate_proxy() -> Optional[Dict[str, str]]:
     """
     Return a randomly selected proxy config or empty dict for direct connection.
     """
-    proxy = random.choice(PROXIES)
-    if proxy is None:
-        return {}
-    return proxy
+    return random.choice(_PROXY_VARIANTS).copy()
 
 def backoff(increase: bool = False) -> None:
     """
@@ -124,17 +132,29 @@ async def async_backoff(increase: bool = False) -> None:
     
     await asyncio.sleep(sleep_time)
 
+CAPTCHA_INDICATORS = (
+    "captcha", "recaptcha", "hcaptcha", "cloudflare",
+    "please verify", "security check", "robot verification",
+    "prove you're human",
+)
+
+RATE_LIMIT_INDICATORS = (
+    "rate limit", "too many requests", "slow down", "exceeded",
+    "throttled", "temporarily blocked",
+)
+
+def _compile_indicators(indicators) -> "re.Pattern[str]":
+    # One case-insensitive alternation scans the raw body once, with no lowercased copy
+    return re.compile("|".join(map(re.escape, indicators)), re.IGNORECASE)
+
+_CAPTCHA_RE = _compile_indicators(CAPTCHA_INDICATORS)
+_RATE_LIMIT_RE = _compile_indicators(RATE_LIMIT_INDICATORS)
+
 def detect_captcha(response_text: str) -> bool:
     """
     Detect CAPTCHA presence in page content by matching common keywords.
     """
-    captcha_indicators = [
-        "captcha", "recaptcha", "hcaptcha", "cloudflare",
-        "please verify", "security check", "robot verification",
-        "prove you're human"
-    ]
-    response_lower = response_text.lower()
-    return any(indicator in response_lower for indicator in captcha_indicators)
+    return _CAPTCHA_RE.search(response_text) is not None
 
 def detect_rate_limit(response_text: str, status_code: int) -> bool:
     """
@@ -142,13 +162,7 @@ def detect_rate_limit(response_text: str, status_code: int) -> bool:
     """
     if status_code == 429:
         return True
-    
-    rate_limit_indicators = [
-        "rate limit", "too many requests", "slow down", "exceeded",
-        "throttled", "temporarily blocked"
-    ]
-    response_lower = response_text.lower()
-    return any(indicator in response_lower for indicator in rate_limit_indicators)
+    return _RATE_LIMIT_RE.search(response_text) is not None
 
 def get_session_config() -> Dict:
     """
@@ -169,7 +183,6 @@ class SessionManager:
         self.sessions = []
         self.max_sessions = max_sessions
         self.current_session = 0
-        self._initialize_sessions()
     
     def _initialize_sessions(self):
         import requests
@@ -181,7 +194,10 @@ class SessionManager:
     def get_session(self) -> 'requests.Session':
         """
         Rotate and return the next requests.Session instance with fresh headers.
+        Sessions are created on first use rather than at construction.
         """
+        if not self.sessions:
+            self._initialize_sessions()
         session = self.sessions[self.current_session]
         self.current_session = (self.current_session + 1) % self.max_sessions
         session.headers.update(get_headers())
@@ -191,11 +207,15 @@ class SessionManager:
         for session in self.sessions:
             session.close()
 
-# Global session manager instance
-_session_manager = SessionManager()
+@lru_cache(maxsize=1)
+def get_session_manager() -> SessionManager:
+    """
+    Return the shared SessionManager, constructing it on first call instead of at import.
+    """
+    return SessionManager()
 
 def get_rotated_session():
     """
     Get a rotated requests session for each request cycle.
     """
-    return _session_manager.get_session()
+    return get_session_manager().get_session()
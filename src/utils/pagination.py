@@ -1,18 +1,59 @@
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse, parse_qs
+import soupsieve
+from urllib.parse import urljoin, urlparse, parse_qsl, urlencode
 import re
 import logging
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 
 logger = logging.getLogger(__name__)
 
+# (pattern, replacement) pairs for page numbers embedded in the path, compiled once at import
+PATH_PATTERNS = (
+    (re.compile(r'/page[-_/](\d+)'), '/page-{}'),
+    (re.compile(r'/page[-_/](\d+)/'), '/page-{}/'),
+    (re.compile(r'page[-_](\d+)\.html'), 'page-{}.html'),
+    (re.compile(r'p(\d+)\.html'), 'p{}.html'),
+)
+NEXT_PAGE_QUERY_PARAMS = ('page', 'p', 'pagenum', 'offset', 'start')
+PAGE_NUMBER_PATTERN = re.compile(r'/page[-_/]?(\d+)')
+PAGE_NUMBER_QUERY_PARAMS = ('page', 'p', 'pagenum')
+
+NEXT_BUTTON_SELECTORS = (
+    "li.next a",
+    ".next a",
+    "a.next",
+    ".pagination .next",
+    ".pager-next a",
+    ".next-page",
+    "[rel='next']",
+    "a[aria-label*='next']",
+    "a[title*='next']",
+    ".pagination-next a",
+)
+PAGINATION_SELECTORS = (
+    ".pagination", ".pager", ".page-numbers", ".paginate", ".page-nav", ".pagination-wrapper",
+)
+LOAD_MORE_SELECTORS = (
+    ".load-more", ".show-more", ".view-more",
+    "[data-next-url]", "[data-load-more]", ".infinite-scroll",
+)
+LOAD_MORE_ATTRS = ('data-next-url', 'data-load-more', 'data-url', 'href')
+NEXT_LINK_TEXTS = frozenset(('next', '>', '→'))
+PAGE_LINK_SELECTORS = (".pagination a", ".pager a", ".page-numbers a")
+# books.toscrape.com next link, compiled once instead of on every get_next_page call
+_NEXT_LINK = soupsieve.compile("li.next a")
+
 class PaginationHandler:
     def __init__(self, base_url: str):
         self.base_url = base_url
         self.visited_urls = set()
+        # Index into PATH_PATTERNS that last matched for each host, tried first on later pages
+        self._pattern_cache: Dict[str, int] = {}
+        # Selector that last succeeded for each (finder, host), tried first on later pages
+        self._selector_cache: Dict[Tuple[str, str], str] = {}
 
     def get_next_page(self, soup: BeautifulSoup, current_url: str) -> Optional[str]:
-        next_url = self._find_next_button(soup)
+        next_url = self._find_next_button(soup, current_url)
         if next_url:
             full_url = urljoin(current_url, next_url)
             if full_url not in self.visited_urls:
@@ -26,7 +67,7 @@ class PaginationHandler:
                 self.visited_urls.add(full_url)
                 return full_url
 
-        next_url = self._find_load_more(soup)
+        next_url = self._find_load_more(soup, current_url)
         if next_url:
             full_url = urljoin(current_url, next_url)
             if full_url not in self.visited_urls:
@@ -42,25 +83,22 @@ class PaginationHandler:
 
         return None
 
-    def _find_next_button(self, soup: BeautifulSoup) -> Optional[str]:
-        selectors = [
-            "li.next a",
-            ".next a",
-            "a.next",
-            ".pagination .next",
-            ".pager-next a",
-            ".next-page",
-            "[rel='next']",
-            "a[aria-label*='next']",
-            "a[title*='next']",
-            ".pagination-next a",
-        ]
+    def _selector_order(self, kind: str, current_url: str, selectors: Tuple[str, ...]) -> Tuple[Tuple[str, str], Tuple[str, ...]]:
+        key = (kind, urlparse(current_url).netloc)
+        cached = self._selector_cache.get(key)
+        if cached is None:
+            return key, selectors
+        return key, (cached,) + tuple(selector for selector in selectors if selector != cached)
+
+    def _find_next_button(self, soup: BeautifulSoup, current_url: str) -> Optional[str]:
+        key, selectors = self._selector_order("next", current_url, NEXT_BUTTON_SELECTORS)
         for selector in selectors:
             try:
                 element = soup.select_one(selector)
                 if element:
                     href = element.get('href')
                     if href:
+                        self._selector_cache[key] = selector
                         return href
             except Exception as e:
                 logger.debug(f"Error finding next button with selector {selector}: {e}")
@@ -70,10 +108,8 @@ class PaginationHandler:
     def _find_numbered_next(self, soup: BeautifulSoup, current_url: str) -> Optional[str]:
         try:
             current_page = self._extract_page_number(current_url)
-            pagination_selectors = [
-                ".pagination", ".pager", ".page-numbers", ".paginate", ".page-nav", ".pagination-wrapper"
-            ]
-            for selector in pagination_selectors:
+            key, selectors = self._selector_order("numbered", current_url, PAGINATION_SELECTORS)
+            for selector in selectors:
                 pagination = soup.select_one(selector)
                 if pagination:
                     page_links = pagination.find_all('a', href=True)
@@ -82,25 +118,25 @@ class PaginationHandler:
                         if link_text.isdigit():
                             page_num = int(link_text)
                             if current_page and page_num == current_page + 1:
+                                self._selector_cache[key] = selector
                                 return link['href']
-                        elif link_text.lower() in ['next', '>', '→']:
+                        elif link_text.lower() in NEXT_LINK_TEXTS:
+                            self._selector_cache[key] = selector
                             return link['href']
         except Exception as e:
             logger.debug(f"Error in numbered pagination detection: {e}")
         return None
 
-    def _find_load_more(self, soup: BeautifulSoup) -> Optional[str]:
-        selectors = [
-            ".load-more", ".show-more", ".view-more",
-            "[data-next-url]", "[data-load-more]", ".infinite-scroll",
-        ]
+    def _find_load_more(self, soup: BeautifulSoup, current_url: str) -> Optional[str]:
+        key, selectors = self._selector_order("load_more", current_url, LOAD_MORE_SELECTORS)
         for selector in selectors:
             try:
                 element = soup.select_one(selector)
                 if element:
-                    for attr in ['data-next-url', 'data-load-more', 'data-url', 'href']:
+                    for attr in LOAD_MORE_ATTRS:
                         url = element.get(attr)
                         if url:
+                            self._selector_cache[key] = selector
                             return url
             except Exception as e:
                 logger.debug(f"Error with load more selector {selector}: {e}")
@@ -110,49 +146,44 @@ class PaginationHandler:
     def _construct_next_page_url(self, current_url: str) -> Optional[str]:
         try:
             parsed = urlparse(current_url)
-            path_patterns = [
-                (r'/page[-_/](\d+)', '/page-{}'),
-                (r'/page[-_/](\d+)/', '/page-{}/'),
-                (r'page[-_](\d+)\.html', 'page-{}.html'),
-                (r'p(\d+)\.html', 'p{}.html'),
-            ]
-
-            for pattern, replacement in path_patterns:
-                match = re.search(pattern, parsed.path)
+            cached = self._pattern_cache.get(parsed.netloc)
+            indices = range(len(PATH_PATTERNS))
+            if cached is not None:
+                indices = [cached] + [i for i in indices if i != cached]
+
+            for index in indices:
+                pattern, replacement = PATH_PATTERNS[index]
+                match = pattern.search(parsed.path)
                 if match:
-                    current_page = int(match.group(1))
-                    next_page = current_page + 1
-                    new_path = re.sub(pattern, replacement.format(next_page), parsed.path)
+                    self._pattern_cache[parsed.netloc] = index
+                    next_page = int(match.group(1)) + 1
+                    new_path = pattern.sub(replacement.format(next_page), parsed.path)
                     return parsed._replace(path=new_path).geturl()
 
-            query_params = parse_qs(parsed.query)
-            for param in ['page', 'p', 'pagenum', 'offset', 'start']:
+            query_params = dict(parse_qsl(parsed.query))
+            for param in NEXT_PAGE_QUERY_PARAMS:
                 if param in query_params:
                     try:
-                        current_page = int(query_params[param][0])
-                        next_page = current_page + 1
-                        query_params[param] = [str(next_page)]
-                        new_query = '&'.join(f"{k}={v[0]}" for k, v in query_params.items())
-                        return parsed._replace(query=new_query).geturl()
-                    except (ValueError, IndexError):
+                        query_params[param] = str(int(query_params[param]) + 1)
+                    except ValueError:
                         continue
+                    return parsed._replace(query=urlencode(query_params)).geturl()
         except Exception as e:
             logger.debug(f"Error constructing next page URL: {e}")
         return None
 
     def _extract_page_number(self, url: str) -> Optional[int]:
         try:
-            path_match = re.search(r'/page[-_/]?(\d+)', url)
+            path_match = PAGE_NUMBER_PATTERN.search(url)
             if path_match:
                 return int(path_match.group(1))
 
-            parsed = urlparse(url)
-            query_params = parse_qs(parsed.query)
-            for param in ['page', 'p', 'pagenum']:
+            query_params = dict(parse_qsl(urlparse(url).query))
+            for param in PAGE_NUMBER_QUERY_PARAMS:
                 if param in query_params:
                     try:
-                        return int(query_params[param][0])
-                    except (ValueError, IndexError):
+                        return int(query_params[param])
+                    except ValueError:
                         continue
         except Exception:
             pass
@@ -161,8 +192,7 @@ class PaginationHandler:
     def get_all_page_urls(self, soup: BeautifulSoup, current_url: str, max_pages: int = 100) -> List[str]:
         page_urls = []
         try:
-            selectors = [".pagination a", ".pager a", ".page-numbers a"]
-            for selector in selectors:
+            for selector in PAGE_LINK_SELECTORS:
                 links = soup.select(selector)
                 for link in links:
                     href = link.get('href')
@@ -176,7 +206,7 @@ class PaginationHandler:
 
 # Custom logic for books.toscrape.com
 def get_next_page(soup: BeautifulSoup, base_url: str) -> Optional[str]:
-    next_button = soup.select_one("li.next a")
+    next_button = _NEXT_LINK.select_one(soup)
     if next_button:
         href = next_button.get("href")
         if href:
@@ -0,0 +1,160 @@
+# tests/conftest.py
+
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+BOOKS_FIXTURE_DIR = Path(__file__).parent / "fixtures" / "books"
+BOOKS_LIVE_URL = "https://books.toscrape.com"
+# Next.js storefront page whose __NEXT_DATA__ product_list feeds the dynamic scraper
+SHOP_FIXTURE_DIR = Path(__file__).parent / "fixtures" / "shop"
+SHOP_LIVE_URL = "https://electricbikecompany.com/shop"
+RECORDED_PAGES = 3
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--record",
+        action="store_true",
+        default=False,
+        help="re-capture the books.toscrape.com catalogue pages served by the local fixture server",
+    )
+    parser.addoption(
+        "--run-slow",
+        action="store_true",
+        default=False,
+        help="also run tests marked slow",
+    )
+    parser.addoption(
+        "--runnet",
+        action="store_true",
+        default=False,
+        help="run tests marked net against the live books.toscrape.com site",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if not config.getoption("--runnet"):
+        skip_net = pytest.mark.skip(reason="needs --runnet")
+        for item in items:
+            if item.get_closest_marker("net"):
+                item.add_marker(skip_net)
+
+    if config.getoption("--run-slow"):
+        return
+    selected, deselected = [], []
+    for item in items:
+        (deselected if item.get_closest_marker("slow") else selected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+def _record_books_pages():
+    import requests
+
+    catalogue_dir = BOOKS_FIXTURE_DIR / "catalogue"
+    catalogue_dir.mkdir(parents=True, exist_ok=True)
+    for page in range(1, RECORDED_PAGES + 1):
+        resp = requests.get(f"{BOOKS_LIVE_URL}/catalogue/page-{page}.html", timeout=30)
+        resp.raise_for_status()
+        (catalogue_dir / f"page-{page}.html").write_bytes(resp.content)
+
+
+@pytest.fixture(scope="session")
+def books_server(request):
+    """Serve the catalogue and shop fixture pages over loopback HTTP for the whole session and yield the base URL."""
+    if request.config.getoption("--record"):
+        _record_books_pages()
+
+    app = web.Application()
+    # Registered before the catch-all catalogue route so /shop/ paths resolve here
+    app.router.add_static("/shop", SHOP_FIXTURE_DIR)
+    app.router.add_static("/", BOOKS_FIXTURE_DIR)
+    runner = web.AppRunner(app)
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    host, port = runner.addresses[0][:2]
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield f"http://{host}:{port}"
+
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.run_until_complete(runner.cleanup())
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def http_client():
+    """One pooled keep-alive httpx client shared by every static scraper in the session."""
+    import httpx
+    from src.config import Config
+
+    client = httpx.Client(
+        http2=True,
+        timeout=Config.REQUEST_TIMEOUT,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+    )
+    yield client
+    client.close()
+
+
+def _fixture_url(request, live_url, path):
+    # net tests only run under --runnet, and then they target the live site instead of the fixtures
+    if request.node.get_closest_marker("net"):
+        return live_url
+    return f"{request.getfixturevalue('books_server')}{path}"
+
+
+@pytest.fixture
+def static_url(request):
+    return _fixture_url(request, f"{BOOKS_LIVE_URL}/catalogue/page-1.html", "/catalogue/page-1.html")
+
+
+@pytest.fixture
+def dynamic_url(request):
+    return _fixture_url(request, SHOP_LIVE_URL, "/shop/index.html")
+
+
+class SleepRecorder:
+    """Stands in for time.sleep / asyncio.sleep and records the requested delays."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, seconds, *args, **kwargs):
+        self.calls.append(seconds)
+
+    async def async_sleep(self, seconds, *args, **kwargs):
+        self.calls.append(seconds)
+
+
+@pytest.fixture
+def fake_sleep(monkeypatch):
+    """Replace real sleeps in the anti-bot helpers so backoff tests assert on the delay without waiting."""
+    recorder = SleepRecorder()
+    monkeypatch.setattr("src.utils.anti_bot.time.sleep", recorder)
+    monkeypatch.setattr("src.utils.anti_bot.asyncio.sleep", recorder.async_sleep)
+    return recorder
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def browser():
+    """One Chromium for the whole session; each scrape still opens its own context."""
+    from playwright.async_api import async_playwright
+
+    playwright = await async_playwright().start()
+    chromium = await playwright.chromium.launch(headless=True)
+    yield chromium
+    await chromium.close()
+    await playwright.stop()
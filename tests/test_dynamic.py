@@ -2,31 +2,33 @@
 
 import pytest
 import asyncio
+import json
 import os
 import sys
-from unittest.mock import Mock, AsyncMock, patch
+from unittest.mock import AsyncMock, patch
+from playwright.async_api import Error as PlaywrightError
 
 # Add src to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.scrapers.dynamic_scraper import scrape_dynamic, DynamicScraper, run_dynamic_scraper
+from src.config import Config
+from src.scrapers.dynamic_scraper import scrape_dynamic, scrape_dynamic_many, DynamicScraper, shutdown
 
-DYNAMIC_URL = "https://books.toscrape.com/catalogue/page-1.html"
 
 class TestDynamicScraper:
     
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @pytest.mark.timeout(90)
-    async def test_dynamic_scraper_returns_data(self):
+    async def test_dynamic_scraper_returns_data(self, dynamic_url, browser):
         """Test that dynamic scraper returns valid data"""
-        data = await scrape_dynamic(DYNAMIC_URL, max_products=5)
+        data = await scrape_dynamic(dynamic_url, max_products=5, browser=browser)
         
         assert isinstance(data, list), "Expected result to be a list"
         assert len(data) > 0, "Expected at least one product"
         
         # Validate product structure
         product = data[0]
-        required_fields = ["name", "price", "link"]
+        required_fields = ["name", "price", "url"]
         
         for field in required_fields:
             assert field in product, f"Missing '{field}' field"
@@ -35,28 +37,29 @@ class TestDynamicScraper:
         # Validate data types and content
         assert isinstance(product["name"], str), "Product name should be a string"
         assert isinstance(product["price"], str), "Product price should be a string"
-        assert isinstance(product["link"], str), "Product link should be a string"
+        assert isinstance(product["url"], str), "Product URL should be a string"
         
         # Price should contain currency symbol
         assert any(symbol in product["price"] for symbol in ["£", "$", "€"]), "Price should contain currency"
         
-        # Link should be a valid URL
-        assert product["link"].startswith("http"), "Link should be a valid URL"
+        # URL should be a valid URL
+        assert product["url"].startswith("http"), "URL should be a valid URL"
     
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @pytest.mark.timeout(60)
-    async def test_dynamic_scraper_max_products_limit(self):
+    async def test_dynamic_scraper_max_products_limit(self, dynamic_url, browser):
         """Test that scraper respects max_products limit"""
         max_products = 3
-        data = await scrape_dynamic(DYNAMIC_URL, max_products=max_products)
+        data = await scrape_dynamic(dynamic_url, max_products=max_products, browser=browser)
         
-        assert len(data) <= max_products, f"Should not exceed {max_products} products"
+        assert len(data) == max_products, f"Should return exactly {max_products} products"
     
-    @pytest.mark.asyncio
+    @pytest.mark.net
+    @pytest.mark.asyncio(loop_scope="session")
     @pytest.mark.timeout(120)
-    async def test_dynamic_scraper_pagination(self):
+    async def test_dynamic_scraper_pagination(self, dynamic_url, browser):
         """Test that scraper can handle multiple pages"""
-        data = await scrape_dynamic(DYNAMIC_URL, max_products=25)  # Should require pagination
+        data = await scrape_dynamic(dynamic_url, max_products=25, browser=browser)  # Should require pagination
         
         assert len(data) > 15, "Should scrape multiple pages"
         
@@ -65,177 +68,269 @@ class TestDynamicScraper:
         unique_names = set(names)
         assert len(unique_names) == len(names), "All products should be unique"
     
-    @pytest.mark.asyncio
-    @pytest.mark.timeout(30)
-    async def test_dynamic_scraper_class_initialization(self):
+    def test_dynamic_scraper_class_initialization(self):
         """Test DynamicScraper class initialization"""
-        scraper = DynamicScraper()
-        assert scraper.retry_count == 3
-        assert scraper.base_url == "https://books.toscrape.com"
+        config = Config()
+        scraper = DynamicScraper(config)
+        assert scraper.config is config
+        assert scraper.browser is None
+        
+        injected = object()
+        assert DynamicScraper(config, browser=injected).browser is injected
     
-    @pytest.mark.asyncio
-    async def test_dynamic_scraper_empty_url(self):
+    @pytest.mark.asyncio(loop_scope="session")
+    @patch('src.scrapers.dynamic_scraper.async_playwright')
+    async def test_dynamic_scraper_empty_url(self, mock_async_playwright):
         """Test scraper behavior with invalid URL"""
+        mock_page = AsyncMock()
+        mock_page.goto.side_effect = PlaywrightError("Protocol error (Page.navigate): Cannot navigate to invalid URL")
+        mock_context = AsyncMock()
+        mock_context.new_page.return_value = mock_page
+        mock_browser = AsyncMock()
+        mock_browser.new_context.return_value = mock_context
+        mock_playwright = AsyncMock()
+        mock_playwright.chromium.launch.return_value = mock_browser
+        mock_async_playwright.return_value.start = AsyncMock(return_value=mock_playwright)
+        
         # This should fail gracefully and return empty list
         try:
             data = await scrape_dynamic("", max_products=5)
-            assert isinstance(data, list), "Should return list even on error"
-        except Exception:
-            # It's acceptable for it to raise an exception with invalid URL
-            pass
+            assert data == [], "Should return empty list on navigation error"
+        finally:
+            await shutdown()
+
+class FakePage:
+    """Plain-coroutine stand-in for a Playwright page whose __NEXT_DATA__ projection returns a fixed payload."""
+    
+    def __init__(self, content=None, error=None):
+        self._content = content
+        self._error = error
+        self.eval_args = None
+    
+    async def goto(self, url, **kwargs):
+        self.url = url
+    
+    async def eval_on_selector(self, selector, expression, arg):
+        if self._error:
+            raise self._error
+        self.eval_args = (selector, arg)
+        return self._content
+
+class FakeContext:
+    """Browser context stand-in that records whether it was closed."""
     
-    def test_run_dynamic_scraper_function(self):
-        """Test the run_dynamic_scraper convenience function"""
-        # This test may create files, so we'll mock the file writing
-        with patch('builtins.open'), patch('json.dump'), patch('os.makedirs'):
-            data = run_dynamic_scraper()
-            assert isinstance(data, list)
+    def __init__(self, page, route_error=None):
+        self._page = page
+        self._route_error = route_error
+        self.closed = False
+    
+    async def route(self, pattern, handler):
+        if self._route_error:
+            raise self._route_error
+    
+    async def new_page(self):
+        return self._page
+    
+    async def close(self):
+        self.closed = True
+
+class FakeBrowser:
+    def __init__(self, context):
+        self._context = context
+    
+    async def new_context(self):
+        return self._context
 
 class TestDynamicScraperMocked:
-    """Tests using mocked playwright components"""
+    """Tests driving _scrape_page through fake Playwright objects"""
     
-    @pytest.mark.asyncio
-    async def test_extract_single_product_success(self):
-        """Test product extraction from a single element"""
-        scraper = DynamicScraper()
-        
-        # Mock element
-        mock_element = AsyncMock()
-        
-        # Mock sub-elements
-        mock_name = AsyncMock()
-        mock_name.get_attribute = AsyncMock(return_value="Test Book Title")
-        
-        mock_price = AsyncMock()
-        mock_price.inner_text = AsyncMock(return_value="£12.99")
-        
-        mock_link = AsyncMock()
-        mock_link.get_attribute = AsyncMock(return_value="test-book.html")
-        
-        mock_rating = AsyncMock()
-        mock_rating.get_attribute = AsyncMock(return_value="star-rating Four")
-        
-        mock_availability = AsyncMock()
-        mock_availability.inner_text = AsyncMock(return_value="In stock (22 available)")
-        
-        # Configure element to return mocked sub-elements
-        async def mock_query_selector(selector):
-            if "h3 a" in selector:
-                return mock_name if "title" not in selector else mock_link
-            elif "price_color" in selector:
-                return mock_price
-            elif "star-rating" in selector:
-                return mock_rating
-            elif "availability" in selector:
-                return mock_availability
-            return None
-        
-        mock_element.query_selector = mock_query_selector
-        
-        # Test extraction
-        product = await scraper._extract_single_product(mock_element)
-        
-        assert product is not None
-        assert product["name"] == "Test Book Title"
-        assert product["price"] == "£12.99"
-        assert "test-book.html" in product["link"]
-        assert product["rating"] == "Four"
-        assert "In stock" in product["availability"]
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_scrape_page_success(self):
+        """Test products are built from the projected __NEXT_DATA__ JSON"""
+        content = json.dumps([
+            {"id": 1, "name": "Test Bike", "slug": "test-bike", "price": "£999.00",
+             "regular_price": None, "image": None, "description": None},
+            {"id": 2, "name": "Other Bike", "slug": "other-bike", "price": "£1,299.00",
+             "regular_price": None, "image": None, "description": None},
+        ])
+        page = FakePage(content)
+        context = FakeContext(page)
+        
+        data = await scrape_dynamic("https://example.com/shop", max_products=2, browser=FakeBrowser(context))
+        
+        assert [product["name"] for product in data] == ["Test Bike", "Other Bike"]
+        assert data[0]["url"] == "https://electricbikecompany.com/shop/products/test-bike"
+        assert page.eval_args == ("script#__NEXT_DATA__", 2)
+        assert context.closed
     
-    @pytest.mark.asyncio
-    async def test_extract_single_product_missing_data(self):
-        """Test product extraction when some data is missing"""
-        scraper = DynamicScraper()
-        
-        # Mock element with missing price
-        mock_element = AsyncMock()
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_scrape_page_invalid_json(self):
+        """Test an unparseable payload returns an empty list"""
+        context = FakeContext(FakePage("not json"))
         
-        async def mock_query_selector(selector):
-            if "h3 a" in selector:
-                mock_name = AsyncMock()
-                mock_name.get_attribute = AsyncMock(return_value="Test Book")
-                return mock_name
-            elif "price_color" in selector:
-                return None  # Missing price
-            return None
+        data = await scrape_dynamic("https://example.com/shop", max_products=5, browser=FakeBrowser(context))
         
-        mock_element.query_selector = mock_query_selector
-        
-        # Should return None if essential data is missing
-        product = await scraper._extract_single_product(mock_element)
-        assert product is None
+        assert data == []
+        assert context.closed
     
-    @pytest.mark.asyncio
-    async def test_navigate_to_next_page_success(self):
-        """Test successful navigation to next page"""
-        scraper = DynamicScraper()
-        
-        # Mock page
-        mock_page = AsyncMock()
-        
-        # Mock next button
-        mock_next_button = AsyncMock()
-        mock_next_button.is_visible = AsyncMock(return_value=True)
-        mock_next_button.is_enabled = AsyncMock(return_value=True)
-        mock_next_button.click = AsyncMock()
-        
-        mock_page.query_selector = AsyncMock(return_value=mock_next_button)
-        mock_page.expect_navigation = AsyncMock()
-        mock_page.wait_for_load_state = AsyncMock()
-        
-        # Mock context manager for expect_navigation
-        class MockNavigation:
-            async def __aenter__(self):
-                return self
-            async def __aexit__(self, *args):
-                pass
-        
-        mock_page.expect_navigation.return_value = MockNavigation()
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_scrape_page_missing_next_data(self):
+        """Test a page without __NEXT_DATA__ returns an empty list"""
+        error = PlaywrightError("Failed to find element matching selector \"script#__NEXT_DATA__\"")
+        context = FakeContext(FakePage(error=error))
         
-        result = await scraper._navigate_to_next_page(mock_page)
+        data = await scrape_dynamic("https://example.com/shop", max_products=5, browser=FakeBrowser(context))
         
-        assert result is True
-        mock_next_button.click.assert_called_once()
-        mock_page.wait_for_load_state.assert_called_once()
+        assert data == []
+        assert context.closed
     
-    @pytest.mark.asyncio
-    async def test_navigate_to_next_page_no_button(self):
-        """Test navigation when no next button exists"""
-        scraper = DynamicScraper()
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_scrape_page_closes_context_when_route_fails(self):
+        """Test the context is closed even if setting it up fails"""
+        context = FakeContext(FakePage(), route_error=PlaywrightError("Target closed"))
         
-        # Mock page with no next button
-        mock_page = AsyncMock()
-        mock_page.query_selector = AsyncMock(return_value=None)
+        data = await scrape_dynamic("https://example.com/shop", max_products=5, browser=FakeBrowser(context))
         
-        result = await scraper._navigate_to_next_page(mock_page)
+        assert data == []
+        assert context.closed
+
+class CatalogPage(FakePage):
+    """Page stand-in that serves the products registered for whichever URL it navigates to."""
+    
+    def __init__(self, products_by_url):
+        super().__init__()
+        self._products_by_url = products_by_url
+    
+    async def goto(self, url, **kwargs):
+        self.url = url
+        # Yield so concurrent scrapes get to open their own contexts meanwhile
+        await asyncio.sleep(0)
+    
+    async def eval_on_selector(self, selector, expression, arg):
+        # The real projection slices the product list in-page
+        return json.dumps(self._products_by_url[self.url][:arg])
+
+class CountingContext(FakeContext):
+    def __init__(self, browser):
+        super().__init__(CatalogPage(browser.products_by_url))
+        self._browser = browser
+    
+    async def close(self):
+        await super().close()
+        self._browser.open_contexts -= 1
+
+class CountingBrowser:
+    """Browser stand-in that tracks how many contexts are open at once."""
+    
+    def __init__(self, products_by_url):
+        self.products_by_url = products_by_url
+        self.open_contexts = 0
+        self.peak_contexts = 0
+    
+    async def new_context(self):
+        self.open_contexts += 1
+        self.peak_contexts = max(self.peak_contexts, self.open_contexts)
+        return CountingContext(self)
+
+class TestDynamicScrapeMany:
+    
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_scrape_dynamic_many(self):
+        """Test results are flattened in URL order, limited per URL, with bounded open contexts"""
+        urls = [f"https://example.com/shop/{n}" for n in range(5)]
+        products_by_url = {
+            url: [{"id": i, "name": f"Bike {n}-{i}", "slug": f"bike-{n}-{i}", "price": "£999.00"} for i in range(3)]
+            for n, url in enumerate(urls)
+        }
+        browser = CountingBrowser(products_by_url)
+        
+        data = await scrape_dynamic_many(urls, max_products=2, max_concurrency=2, browser=browser)
+        
+        assert [product["name"] for product in data] == [f"Bike {n}-{i}" for n in range(5) for i in range(2)]
+        assert browser.peak_contexts == 2, "Should run up to max_concurrency scrapes at once, and no more"
+        assert browser.open_contexts == 0, "Every context should be closed"
+
+def patched_playwright(mock_async_playwright):
+    """Wire a mocked async_playwright whose browser hands out fresh fake contexts, and return the Playwright mock."""
+    content = json.dumps([{"id": 1, "name": "Test Bike", "slug": "test-bike", "price": "£999.00"}])
+    mock_browser = AsyncMock()
+    mock_browser.new_context.side_effect = lambda: FakeContext(FakePage(content))
+    mock_playwright = AsyncMock()
+    mock_playwright.chromium.launch.return_value = mock_browser
+    
+    async def start():
+        # Yield during startup so a concurrent caller reaches the lock while the launch is in flight
+        await asyncio.sleep(0)
+        return mock_playwright
+    
+    mock_async_playwright.return_value.start = AsyncMock(side_effect=start)
+    return mock_playwright
+
+class TestSharedBrowser:
+    """Lifecycle of the module-level browser used when none is injected"""
+    
+    @pytest.mark.asyncio(loop_scope="session")
+    @patch('src.scrapers.dynamic_scraper.async_playwright')
+    async def test_concurrent_calls_share_one_launch(self, mock_async_playwright):
+        """Test concurrent callers share a single browser launch and shutdown() releases it"""
+        mock_playwright = patched_playwright(mock_async_playwright)
         
-        assert result is False
+        try:
+            first, second = await asyncio.gather(
+                scrape_dynamic("https://example.com/shop/a", max_products=1),
+                scrape_dynamic("https://example.com/shop/b", max_products=1),
+            )
+            assert first and second
+            mock_playwright.chromium.launch.assert_awaited_once()
+        finally:
+            await shutdown()
+        
+        mock_playwright.chromium.launch.return_value.close.assert_awaited_once()
+        mock_playwright.stop.assert_awaited_once()
+    
+    @patch('src.scrapers.dynamic_scraper.async_playwright')
+    def test_new_event_loop_relaunches(self, mock_async_playwright):
+        """Test a fresh event loop gets its own browser after the previous one was shut down"""
+        mock_playwright = patched_playwright(mock_async_playwright)
+        
+        async def scrape_and_shutdown():
+            try:
+                return await scrape_dynamic("https://example.com/shop", max_products=1)
+            finally:
+                await shutdown()
+        
+        # Private loops, so the session loop stays the current one for later async tests
+        for _ in range(2):
+            loop = asyncio.new_event_loop()
+            try:
+                assert loop.run_until_complete(scrape_and_shutdown())
+            finally:
+                loop.close()
+        assert mock_playwright.chromium.launch.await_count == 2
+        assert mock_playwright.stop.await_count == 2
 
 class TestAsyncUtils:
     
-    @pytest.mark.asyncio
-    async def test_async_backoff(self):
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_async_backoff(self, fake_sleep):
         """Test async backoff function"""
-        import time
-        from src.scrapers.dynamic_scraper import DynamicScraper
+        from src.utils.anti_bot import async_backoff
         
-        scraper = DynamicScraper()
+        await async_backoff()
+        delay = fake_sleep.calls[-1]
         
-        start_time = time.time()
-        await scraper._async_backoff()
-        elapsed = time.time() - start_time
-        
-        assert elapsed >= 1.0, "Should wait at least 1 second"
-        assert elapsed <= 4.0, "Should not wait more than 4 seconds normally"
+        assert delay >= 1.0, "Should wait at least 1 second"
+        assert delay <= 4.0, "Should not wait more than 4 seconds normally"
 
 # Integration tests
+@pytest.mark.net
 class TestDynamicIntegration:
     
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @pytest.mark.timeout(150)
-    async def test_end_to_end_dynamic_scraping(self):
+    async def test_end_to_end_dynamic_scraping(self, dynamic_url, browser):
         """End-to-end test of dynamic scraping process"""
-        data = await scrape_dynamic(DYNAMIC_URL, max_products=8)
+        data = await scrape_dynamic(dynamic_url, max_products=8, browser=browser)
         
         assert len(data) > 0, "Should scrape some products"
         assert len(data) <= 8, "Should respect max products limit"
@@ -244,48 +339,25 @@ class TestDynamicIntegration:
         for product in data:
             assert product["name"], "Each product should have a name"
             assert product["price"], "Each product should have a price"
-            assert product["link"], "Each product should have a link"
+            assert product["url"], "Each product should have a URL"
             
             # Additional fields should be present
-            assert "rating" in product
-            assert "availability" in product
-    
-    @pytest.mark.slow
-    @pytest.mark.asyncio
-    @pytest.mark.timeout(200)
-    async def test_large_dynamic_scraping_task(self):
-        """Test scraping a larger number of products with dynamic scraper"""
-        data = await scrape_dynamic(DYNAMIC_URL, max_products=25)
-        
-        assert len(data) >= 15, "Should scrape at least 15 products"
-        assert len(data) <= 25, "Should respect max products limit"
-        
-        # Check data quality
-        names = [p["name"] for p in data]
-        assert len(set(names)) == len(names), "All product names should be unique"
-        
-        prices = [p["price"] for p in data]
-        assert all(price for price in prices), "All products should have prices"
-        
-        links = [p["link"] for p in data]
-        assert all(link and link.startswith("http") for link in links), "All links should be valid URLs"
+            assert "id" in product
+            assert "slug" in product
 
 # Performance tests
+@pytest.mark.net
 class TestPerformance:
     
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @pytest.mark.timeout(180)
-    async def test_dynamic_scraper_performance(self):
+    async def test_dynamic_scraper_performance(self, dynamic_url, browser):
         """Test that dynamic scraper completes within reasonable time"""
-        import time
-        
-        start_time = time.time()
-        data = await scrape_dynamic(DYNAMIC_URL, max_products=10)
-        elapsed = time.time() - start_time
-        
+        from time import perf_counter
+
+        start_time = perf_counter()
+        data = await scrape_dynamic(dynamic_url, max_products=10, browser=browser)
+        elapsed = perf_counter() - start_time
+
         assert len(data) > 0, "Should return some data"
-        assert elapsed < 120, "Should complete within 2 minutes for 10 products"
-        
-        # Calculate products per second
-        rate = len(data) / elapsed if elapsed > 0 else 0
-        assert rate > 0.05, "Should scrape at least 1 product per 20 seconds"
\ No newline at end of file
+        assert elapsed < 120, "Should complete within 2 minutes for 10 products"
\ No newline at end of file
@@ -0,0 +1,51 @@
+# tests/test_large.py
+
+import pytest
+import asyncio
+import os
+import sys
+from functools import partial
+
+# Add src to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.scrapers.static_scraper import scrape_static
+from src.scrapers.dynamic_scraper import scrape_dynamic
+
+
+@pytest.fixture
+def scrape_target(request):
+    """Resolve only the URL and shared resource the parametrised scraper needs, so the static case never launches Chromium."""
+    url_fixture, kwarg, resource_fixture = request.param
+    return request.getfixturevalue(url_fixture), {kwarg: request.getfixturevalue(resource_fixture)}
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.timeout(200)
+@pytest.mark.parametrize("scrape,scrape_target,link_key,max_products,min_products", [
+    (scrape_static, ("static_url", "client", "http_client"), "link", 30, 20),
+    (scrape_dynamic, ("dynamic_url", "browser", "browser"), "url", 25, 15),
+], ids=["static", "dynamic"], indirect=["scrape_target"])
+async def test_large_scraping_task(scrape, scrape_target, link_key, max_products, min_products):
+    """Test scraping a larger number of products (closer to assignment requirement)"""
+    url, resources = scrape_target
+    if asyncio.iscoroutinefunction(scrape):
+        data = await scrape(url, max_products=max_products, **resources)
+    else:
+        # The static scraper runs its own event loop, so keep it off the test loop
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(None, partial(scrape, url, max_products=max_products, **resources))
+    
+    assert len(data) >= min_products, f"Should scrape at least {min_products} products"
+    assert len(data) <= max_products, "Should respect max products limit"
+    
+    # Check data quality
+    names = [p["name"] for p in data]
+    assert len(set(names)) == len(names), "All product names should be unique"
+    
+    prices = [p["price"] for p in data]
+    assert all(price for price in prices), "All products should have prices"
+    
+    links = [p[link_key] for p in data]
+    assert all(link and link.startswith("http") for link in links), "All links should be valid URLs"
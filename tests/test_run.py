@@ -0,0 +1,49 @@
+# tests/test_run.py
+
+import csv
+import os
+import sys
+
+# Add src to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from run import save_csv, CSV_CHUNK_SIZE
+
+
+class TestSaveCsv:
+
+    def test_save_csv_streams_generator(self, tmp_path):
+        """Test rows from a generator spanning several chunks are all written in order"""
+        total = CSV_CHUNK_SIZE * 2 + 7
+        rows = ({"name": f"Book {i}", "price": f"£{i}.00", "link": f"https://example.com/{i}"} for i in range(total))
+        path = tmp_path / "products.csv"
+
+        count = save_csv(rows, path)
+
+        assert count == total
+        with open(path, newline="", encoding="utf-8") as f:
+            written = list(csv.reader(f))
+        assert written[0] == ["name", "price", "link"]
+        assert len(written) == total + 1
+        assert written[1] == ["Book 0", "£0.00", "https://example.com/0"]
+        assert written[-1] == [f"Book {total - 1}", f"£{total - 1}.00", f"https://example.com/{total - 1}"]
+
+    def test_save_csv_empty_iterable(self, tmp_path):
+        """Test an empty iterable returns 0 and writes no file"""
+        path = tmp_path / "products.csv"
+
+        assert save_csv(iter([]), path) == 0
+        assert not path.exists()
+
+    def test_save_csv_missing_keys(self, tmp_path):
+        """Test keys missing from later rows are written as empty cells instead of raising"""
+        rows = [
+            {"name": "Book 1", "price": "£1.00", "link": "https://example.com/1"},
+            {"name": "Book 2", "price": "£2.00"},
+        ]
+        path = tmp_path / "products.csv"
+
+        assert save_csv(rows, path) == 2
+        with open(path, newline="", encoding="utf-8") as f:
+            written = list(csv.reader(f))
+        assert written[2] == ["Book 2", "£2.00", ""]
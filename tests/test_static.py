@@ -1,9 +1,10 @@
 # tests/test_static.py
 
+import httpx
+import logging
 import pytest
 import os
 import sys
-from unittest.mock import Mock, patch
 
 # Add src to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -12,14 +13,13 @@ from src.scrapers.static_scraper import scrape_static, StaticScraper
 from src.utils.anti_bot import get_headers, rotate_proxy
 from src.utils.pagination import get_next_page
 
-STATIC_URL = "https://books.toscrape.com/catalogue/page-1.html"
 
 class TestStaticScraper:
     
     @pytest.mark.timeout(60)
-    def test_static_scraper_returns_data(self):
+    def test_static_scraper_returns_data(self, static_url, http_client):
         """Test that static scraper returns valid data"""
-        data = scrape_static(STATIC_URL, max_products=5)
+        data = scrape_static(static_url, max_products=5, client=http_client)
         
         assert isinstance(data, list), "Expected result to be a list"
         assert len(data) > 0, "Expected at least one product"
@@ -44,17 +44,17 @@ class TestStaticScraper:
         assert product["link"].startswith("http"), "Link should be a valid URL"
     
     @pytest.mark.timeout(30)
-    def test_static_scraper_max_products_limit(self):
+    def test_static_scraper_max_products_limit(self, static_url, http_client):
         """Test that scraper respects max_products limit"""
         max_products = 3
-        data = scrape_static(STATIC_URL, max_products=max_products)
+        data = scrape_static(static_url, max_products=max_products, client=http_client)
         
         assert len(data) <= max_products, f"Should not exceed {max_products} products"
     
     @pytest.mark.timeout(90)
-    def test_static_scraper_pagination(self):
+    def test_static_scraper_pagination(self, static_url, http_client):
         """Test that scraper can handle multiple pages"""
-        data = scrape_static(STATIC_URL, max_products=25)  # Should require pagination
+        data = scrape_static(static_url, max_products=25, client=http_client)  # Should require pagination
         
         assert len(data) > 20, "Should scrape multiple pages"
         
@@ -63,42 +63,34 @@ class TestStaticScraper:
         unique_prices = set(prices)
         assert len(unique_prices) > 5, "Should have variety from multiple pages"
     
-    def test_static_scraper_empty_url(self):
+    @pytest.mark.net
+    def test_static_scraper_empty_url(self, http_client):
         """Test scraper behavior with invalid URL"""
-        data = scrape_static("", max_products=5)
+        data = scrape_static("", max_products=5, client=http_client)
         assert isinstance(data, list), "Should return empty list for invalid URL"
     
-    def test_static_scraper_class_initialization(self):
+    def test_static_scraper_class_initialization(self, http_client):
         """Test StaticScraper class can be initialized"""
-        scraper = StaticScraper()
+        scraper = StaticScraper(client=http_client)
         assert scraper.retry_count == 3
         assert scraper.base_url == "https://books.toscrape.com"
     
-    @patch('src.scrapers.static_scraper.requests.Session.get')
-    def test_static_scraper_error_handling(self, mock_get):
+    def test_static_scraper_error_handling(self, respx_mock, static_url, http_client):
         """Test error handling in static scraper"""
-        # Mock a failed request
-        mock_response = Mock()
-        mock_response.status_code = 500
-        mock_response.raise_for_status.side_effect = Exception("Server Error")
-        mock_get.return_value = mock_response
+        # Serve a failed request straight from the transport layer
+        route = respx_mock.get(static_url).respond(500)
         
-        scraper = StaticScraper()
-        data = scraper.scrape_static(STATIC_URL, max_products=5)
+        scraper = StaticScraper(client=http_client)
+        data = scraper.scrape_static(static_url, max_products=5)
         
         # Should return empty list on error
-        assert isinstance(data, list)
+        assert route.call_count == 1
+        assert data == []
     
-    @patch('src.scrapers.static_scraper.requests.Session.get')
-    def test_static_scraper_rate_limit_handling(self, mock_get):
+    def test_static_scraper_rate_limit_handling(self, respx_mock, static_url, http_client, fake_sleep):
         """Test rate limit (429) handling"""
-        # Mock a rate limit response then success
-        mock_429_response = Mock()
-        mock_429_response.status_code = 429
-        
-        mock_200_response = Mock()
-        mock_200_response.status_code = 200
-        mock_200_response.text = '''
+        # Reply with a rate limit then success
+        html = '''
         <html>
             <article class="product_pod">
                 <h3><a title="Test Book" href="test.html"></a></h3>
@@ -108,15 +100,90 @@ class TestStaticScraper:
             </article>
         </html>
         '''
+        route = respx_mock.get(static_url)
+        route.side_effect = [httpx.Response(429), httpx.Response(200, text=html)]
         
-        mock_get.side_effect = [mock_429_response, mock_200_response]
-        
-        scraper = StaticScraper()
-        data = scraper.scrape_static(STATIC_URL, max_products=1)
+        scraper = StaticScraper(client=http_client)
+        data = scraper.scrape_static(static_url, max_products=1)
         
         # Should handle rate limit and return data on retry
-        assert len(mock_get.call_args_list) == 2  # Called twice
-        assert isinstance(data, list)
+        assert route.call_count == 2  # Called twice
+        assert len(fake_sleep.calls) == 1
+        assert [product["name"] for product in data] == ["Test Book"]
+
+CATALOGUE = "https://books.toscrape.com/catalogue"
+
+def catalogue_page(page, count=2, next_page=None):
+    """Build a minimal catalogue page whose products are named after the page they came from."""
+    articles = "".join(
+        f'''
+            <article class="product_pod">
+                <h3><a title="Page {page} Book {i}" href="book-{page}-{i}.html"></a></h3>
+                <p class="price_color">£{page}.{i:02d}</p>
+            </article>'''
+        for i in range(1, count + 1)
+    )
+    pager = f'<ul class="pager"><li class="next"><a href="page-{next_page}.html">next</a></li></ul>' if next_page else ""
+    return f"<html><body>{articles}{pager}</body></html>"
+
+def page_names(data):
+    return [product["name"].rsplit(" Book ", 1)[0] for product in data]
+
+class TestStaticPaginationBatching:
+    """Offline tests for the speculative multi-page fetching in iter_static"""
+    
+    @pytest.mark.timeout(60)
+    def test_full_crawl_without_limit(self, static_url, http_client):
+        """Test max_products=0 walks every fixture page and ignores the speculative 404s past the end"""
+        data = scrape_static(static_url, max_products=0, client=http_client)
+        
+        assert len(data) == 60, "Should collect all three fixture pages"
+        assert len({product["name"] for product in data}) == 60, "All products should be unique"
+    
+    @pytest.mark.respx(assert_all_called=False)
+    def test_next_link_out_of_sequence(self, respx_mock, http_client, fake_sleep):
+        """Test speculated pages are discarded when the real next link jumps elsewhere"""
+        respx_mock.get(f"{CATALOGUE}/page-1.html").respond(200, text=catalogue_page(1, next_page=2))
+        respx_mock.get(f"{CATALOGUE}/page-2.html").respond(200, text=catalogue_page(2, next_page=7))
+        respx_mock.get(f"{CATALOGUE}/page-3.html").respond(200, text=catalogue_page(3, next_page=4))
+        respx_mock.get(f"{CATALOGUE}/page-7.html").respond(200, text=catalogue_page(7))
+        respx_mock.route().respond(404)
+        
+        scraper = StaticScraper(client=http_client)
+        data = scraper.scrape_static(f"{CATALOGUE}/page-1.html", max_products=0)
+        
+        assert page_names(data) == ["Page 1", "Page 1", "Page 2", "Page 2", "Page 7", "Page 7"]
+    
+    @pytest.mark.respx(assert_all_called=False)
+    def test_failed_page_mid_batch_stops_crawl(self, respx_mock, http_client, fake_sleep, caplog):
+        """Test a 500 inside a batch ends the crawl after the pages before it, with a warning"""
+        respx_mock.get(f"{CATALOGUE}/page-1.html").respond(200, text=catalogue_page(1, next_page=2))
+        respx_mock.get(f"{CATALOGUE}/page-2.html").respond(200, text=catalogue_page(2, next_page=3))
+        respx_mock.get(f"{CATALOGUE}/page-3.html").respond(500)
+        respx_mock.get(f"{CATALOGUE}/page-4.html").respond(200, text=catalogue_page(4))
+        respx_mock.route().respond(404)
+        
+        scraper = StaticScraper(client=http_client)
+        with caplog.at_level(logging.WARNING, logger="src.scrapers.static_scraper"):
+            data = scraper.scrape_static(f"{CATALOGUE}/page-1.html", max_products=0)
+        
+        assert page_names(data) == ["Page 1", "Page 1", "Page 2", "Page 2"]
+        assert "Crawl stopped early" in caplog.text
+    
+    @pytest.mark.respx(assert_all_called=False)
+    def test_rate_limited_later_page_is_retried(self, respx_mock, http_client, fake_sleep):
+        """Test a 429 on page 2 is retried inside the batch instead of ending the crawl"""
+        respx_mock.get(f"{CATALOGUE}/page-1.html").respond(200, text=catalogue_page(1, next_page=2))
+        page_2 = respx_mock.get(f"{CATALOGUE}/page-2.html")
+        page_2.side_effect = [httpx.Response(429), httpx.Response(200, text=catalogue_page(2))]
+        respx_mock.route().respond(404)
+        
+        scraper = StaticScraper(client=http_client)
+        data = scraper.scrape_static(f"{CATALOGUE}/page-1.html", max_products=0)
+        
+        assert page_2.call_count == 2
+        assert fake_sleep.calls, "Should back off before retrying"
+        assert page_names(data) == ["Page 1", "Page 1", "Page 2", "Page 2"]
 
 class TestAntiBot:
     
@@ -139,17 +206,14 @@ class TestAntiBot:
         proxy = rotate_proxy()
         assert isinstance(proxy, dict)
     
-    def test_backoff_function(self):
+    def test_backoff_function(self, fake_sleep):
         """Test backoff timing"""
-        import time
-        
-        start_time = time.time()
         from src.utils.anti_bot import backoff
         backoff()  # Normal backoff
-        elapsed = time.time() - start_time
+        delay = fake_sleep.calls[-1]
         
-        assert elapsed >= 1.0, "Should wait at least 1 second"
-        assert elapsed <= 4.0, "Should not wait more than 4 seconds normally"
+        assert delay >= 1.0, "Should wait at least 1 second"
+        assert delay <= 4.0, "Should not wait more than 4 seconds normally"
 
 class TestPagination:
     
@@ -166,29 +230,29 @@ class TestPagination:
         </html>
         '''
         
-        soup = BeautifulSoup(html, "html.parser")
-        next_url = get_next_page(soup)
+        soup = BeautifulSoup(html, "lxml")
+        next_url = get_next_page(soup, "https://books.toscrape.com/catalogue/page-1.html")
         
-        assert next_url is not None
-        assert "page-2.html" in next_url
+        assert next_url == "https://books.toscrape.com/catalogue/page-2.html"
     
     def test_get_next_page_no_next(self):
         """Test get_next_page when no next button exists"""
         from bs4 import BeautifulSoup
         
         html = '<html><div>No pagination</div></html>'
-        soup = BeautifulSoup(html, "html.parser")
-        next_url = get_next_page(soup)
+        soup = BeautifulSoup(html, "lxml")
+        next_url = get_next_page(soup, "https://books.toscrape.com/catalogue/page-1.html")
         
         assert next_url is None
 
 # Integration tests
+@pytest.mark.net
 class TestIntegration:
     
     @pytest.mark.timeout(120)
-    def test_end_to_end_static_scraping(self):
+    def test_end_to_end_static_scraping(self, static_url, http_client):
         """End-to-end test of static scraping process"""
-        data = scrape_static(STATIC_URL, max_products=10)
+        data = scrape_static(static_url, max_products=10, client=http_client)
         
         assert len(data) > 0, "Should scrape some products"
         assert len(data) <= 10, "Should respect max products limit"
@@ -197,24 +261,7 @@ class TestIntegration:
         for product in data:
             assert product["name"], "Each product should have a name"
             assert product["price"], "Each product should have a price"
-            assert product["link"], "Each product should have a link"
+            assert product["link"].startswith("http"), "Each product should have an absolute link"
             
-            # Additional fields should be present
-            assert "rating" in product
-            assert "availability" in product
-    
-    @pytest.mark.slow
-    @pytest.mark.timeout(180)  
-    def test_large_scraping_task(self):
-        """Test scraping a larger number of products (closer to assignment requirement)"""
-        data = scrape_static(STATIC_URL, max_products=30)
-        
-        assert len(data) >= 20, "Should scrape at least 20 products"
-        assert len(data) <= 30, "Should respect max products limit"
-        
-        # Check data quality
-        names = [p["name"] for p in data]
-        assert len(set(names)) == len(names), "All product names should be unique"
-        
-        prices = [p["price"] for p in data]
-        assert all(price for price in prices), "All products should have prices"
\ No newline at end of file
+            # The static scraper emits exactly these fields
+            assert set(product) == {"name", "price", "link"}